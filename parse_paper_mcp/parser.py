@@ -1,20 +1,142 @@
 """PDF parsing logic for academic papers."""
 
+import multiprocessing
 import os
+import shutil
 import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from io import BytesIO
 from pathlib import Path
 from typing import Literal
 import pymupdf4llm
 import pymupdf
+from PIL import Image
 
 from .image_utils import (
     compress_and_resize_image,
     image_to_base64,
+    resolve_preset,
+    Preset,
     QualityLevel,
     ImageFormat,
 )
 
 
+# Worker pool for image compression, created on first use and shared by calls
+_executor: ProcessPoolExecutor | None = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """
+    Return the shared image worker pool, creating it on first use.
+
+    Workers never fork from the (multi-threaded) server process: they start
+    from a forkserver that has already imported this module, or are spawned
+    where forkserver is unavailable.
+    """
+    global _executor
+    if _executor is None:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([__name__])
+        else:
+            context = multiprocessing.get_context("spawn")
+        _executor = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=context)
+    return _executor
+
+
+def _shutdown_executor() -> None:
+    """Shut down the shared worker pool; the next call creates a new one."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _submit_jobs(job_args: list[tuple]) -> list[Future]:
+    """
+    Submit image jobs to the shared worker pool.
+
+    A worker that dies while the pool is idle leaves it broken, so submission
+    fails; the pool is then replaced and the jobs are submitted once more.
+    """
+    try:
+        executor = _get_executor()
+        return [executor.submit(_process_image, *args) for args in job_args]
+    except BrokenProcessPool:
+        _shutdown_executor()
+        executor = _get_executor()
+        return [executor.submit(_process_image, *args) for args in job_args]
+
+
+def _decode_xref(pdf_path: str, xref: int, max_size: int) -> Image.Image:
+    """
+    Decode an embedded image into a PIL image without an intermediate encode.
+
+    Sources more than twice max_size are first halved with Pixmap.shrink; the
+    exact Lanczos step is left to compress_and_resize_image.
+    """
+    with pymupdf.open(pdf_path) as doc:
+        pix = pymupdf.Pixmap(doc, xref)
+        if pix.colorspace is None:
+            # Stencil masks (/ImageMask) have no colorspace to convert from;
+            # extract_image renders them to an encoded image instead
+            base_image = doc.extract_image(xref)
+            source = BytesIO(base_image["image"])
+            source.name = f"img.{base_image['ext']}"
+            return Image.open(source)
+
+    if pix.colorspace.n not in (1, 3):
+        pix = pymupdf.Pixmap(pymupdf.csRGB, pix)
+
+    factor = 0
+    while max(pix.width, pix.height) >> (factor + 1) >= max_size:
+        factor += 1
+    if factor:
+        pix.shrink(factor)
+
+    mode = ("L" if pix.colorspace.n == 1 else "RGB") + ("A" if pix.alpha else "")
+    return Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+
+
+def _process_image(
+    pdf_path: str,
+    source: BytesIO | int,
+    output_path: Path,
+    preset: Preset,
+    image_format: ImageFormat,
+    return_base64: bool,
+) -> dict:
+    """
+    Compress a single extracted image. Runs in a worker process.
+
+    Args:
+        pdf_path: Path to the PDF file
+        source: Encoded JPEG bytes, or the xref of an image to decode here
+        output_path: Path to save the compressed image
+        preset: Size and encoder settings to compress with
+        image_format: Output format (jpg or png)
+        return_base64: Whether to also return the image as base64
+
+    Returns:
+        Image metadata, plus a "base64" entry if requested
+    """
+    if isinstance(source, int):
+        source = _decode_xref(pdf_path, source, preset.max_size)
+
+    metadata = compress_and_resize_image(
+        source,
+        output_path,
+        quality=preset,
+        image_format=image_format,
+    )
+    if return_base64:
+        metadata["base64"] = image_to_base64(output_path, preset)
+    return metadata
+
+
 class PaperParser:
     """Parser for academic papers in PDF format."""
 
@@ -28,6 +150,26 @@ class PaperParser:
         self.pdf_path = Path(pdf_path)
         if not self.pdf_path.exists():
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        self._doc = None
+
+    @property
+    def doc(self) -> pymupdf.Document:
+        """PyMuPDF document, opened on first use and shared across calls."""
+        if self._doc is None:
+            self._doc = pymupdf.open(str(self.pdf_path))
+        return self._doc
+
+    def close(self) -> None:
+        """Close the shared document if it has been opened."""
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+
+    def __enter__(self) -> "PaperParser":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def extract_text(
         self,
@@ -41,12 +183,44 @@ class PaperParser:
         Args:
             pages: List of page numbers (0-based) to extract. None for all pages.
             max_chars: Maximum number of characters to return. None for no limit.
+                On pymupdf4llm's rag backend, conversion stops at the first page
+                that reaches the limit. The layout backend (used by default when
+                pymupdf_layout is installed) converts the whole document first.
             save_to_file: Path to save the full text. If provided, only metadata is returned.
 
         Returns:
             Markdown-formatted text (or metadata if saved to file)
         """
-        md_text = pymupdf4llm.to_markdown(str(self.pdf_path), pages=pages)
+        # pymupdf4llm modifies the document it converts (bakes annotations,
+        # drops StructTreeRoot), so it gets a private copy instead of self.doc
+        with pymupdf.open(str(self.pdf_path)) as text_doc:
+            # Without a page selection, convert page by page and stop once
+            # max_chars is reached instead of converting the whole document.
+            # Heading levels are ranked by font size, so they are identified
+            # once over the whole document to match a single conversion. Only
+            # the rag backend accepts that (hdr_info); the layout backend
+            # always converts the whole document.
+            identify_headers = getattr(pymupdf4llm, "IdentifyHeaders", None)
+            stop_early = (
+                bool(max_chars)
+                and pages is None
+                and not save_to_file
+                and identify_headers is not None
+            )
+            if stop_early:
+                hdr_info = identify_headers(text_doc)
+                page_count = len(text_doc)
+                chunks = []
+                total_chars = 0
+                for page_num in range(page_count):
+                    chunk = pymupdf4llm.to_markdown(text_doc, pages=[page_num], hdr_info=hdr_info)
+                    chunks.append(chunk)
+                    total_chars += len(chunk)
+                    if total_chars > max_chars:
+                        break
+                md_text = "".join(chunks)
+            else:
+                md_text = pymupdf4llm.to_markdown(text_doc, pages=pages)
 
         # Save to file if requested
         if save_to_file:
@@ -63,13 +237,18 @@ class PaperParser:
             )
 
         # Apply character limit if specified
-        original_length = len(md_text)
         if max_chars and len(md_text) > max_chars:
+            if stop_early:
+                extent = f"{max_chars:,} characters from the first {len(chunks)} of {page_count} pages"
+            else:
+                extent = (
+                    f"{max_chars:,} of {len(md_text):,} characters "
+                    f"({100 * max_chars / len(md_text):.1f}%)"
+                )
             md_text = md_text[:max_chars]
             md_text += (
                 f"\n\n---\n\n"
-                f"**⚠️ TEXT TRUNCATED**: Showing {max_chars:,} of {original_length:,} characters "
-                f"({100 * max_chars / original_length:.1f}%). "
+                f"**⚠️ TEXT TRUNCATED**: Showing {extent}. "
                 f"Use `pages` parameter to extract specific pages, or `save_to_file` to save the full text."
             )
 
@@ -87,7 +266,7 @@ class PaperParser:
 
         Args:
             output_dir: Directory to save images (None for temp directory)
-            quality: Quality level (high/medium/low)
+            quality: Quality level (high/medium/low/fast)
             image_format: Output format (png/jpg)
             return_base64: If True, return base64 encoded images instead of paths
 
@@ -101,72 +280,123 @@ class PaperParser:
             output_dir = Path(output_dir)
             output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Create a temporary directory for raw images
-        temp_dir = Path(tempfile.mkdtemp(prefix="parse_paper_raw_"))
-
-        try:
-            # Use PyMuPDF directly for better image extraction
-            doc = pymupdf.open(str(self.pdf_path))
-            images_info = []
-
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                image_list = page.get_images(full=True)
-
-                for img_index, img_info in enumerate(image_list, start=1):
-                    xref = img_info[0]
+        # Resolve the preset once for every image in the loop
+        preset = resolve_preset(quality)
+        max_size = preset.max_size
+
+        # Use PyMuPDF directly for better image extraction
+        doc = self.doc
+        images_info = []
+        jobs = []
+        # Images reused across the document (logos, badges) share an xref
+        seen = {}
+        duplicates = []
+
+        for page_num in range(len(doc)):
+            # Read the page's image list without loading the page itself
+            image_list = doc.get_page_images(page_num, full=True)
+
+            for img_index, img_info in enumerate(image_list, start=1):
+                xref = img_info[0]
+
+                try:
+                    # Generate output filename
+                    output_filename = f"page{page_num + 1}_img{img_index}.{image_format}"
+                    output_path = Path(output_dir) / output_filename
+
+                    img_data = {
+                        "page": page_num + 1,
+                        "index": img_index,
+                        "filename": output_filename,
+                        "path": str(output_path),
+                    }
+
+                    if xref in seen:
+                        # Already processed: copy its output once the first one is done
+                        images_info.append(img_data)
+                        duplicates.append((img_data, seen[xref]))
+                        continue
 
-                    try:
-                        # Extract image
-                        base_image = doc.extract_image(xref)
-                        if base_image:
-                            image_bytes = base_image["image"]
-                            image_ext = base_image["ext"]
+                    if img_info[8] != "DCTDecode":
+                        # Non-JPEG streams: the worker decodes them straight to
+                        # pixels, since extract_image would transcode them to PNG
+                        images_info.append(img_data)
+                        jobs.append((img_data, xref, output_path))
+                        seen[xref] = img_data
+                        continue
 
-                            # Save raw image temporarily
-                            raw_image_path = temp_dir / f"temp_{page_num}_{img_index}.{image_ext}"
-                            with open(raw_image_path, "wb") as img_file:
+                    # Extract image
+                    base_image = doc.extract_image(xref)
+                    if base_image:
+                        image_bytes = base_image["image"]
+                        image_ext = base_image["ext"]
+
+                        if (
+                            image_format == "jpg"
+                            and image_ext in ("jpeg", "jpg")
+                            and base_image.get("colorspace") in (1, 3)
+                            and max(base_image["width"], base_image["height"]) <= max_size
+                        ):
+                            # Embedded JPEG already fits: pass it through untouched
+                            with open(output_path, "wb") as img_file:
                                 img_file.write(image_bytes)
 
-                            # Generate output filename
-                            output_filename = f"page{page_num + 1}_img{img_index}.{image_format}"
-                            output_path = Path(output_dir) / output_filename
-
-                            # Compress and resize
-                            metadata = compress_and_resize_image(
-                                raw_image_path,
-                                output_path,
-                                quality=quality,
-                                image_format=image_format,
+                            img_data.update(
+                                width=base_image["width"],
+                                height=base_image["height"],
+                                file_size=len(image_bytes),
+                                format=image_format.upper(),
                             )
-
-                            img_data = {
-                                "page": page_num + 1,
-                                "index": img_index,
-                                "filename": output_filename,
-                                "path": str(output_path),
-                                **metadata,
-                            }
-
-                            # Add base64 if requested
                             if return_base64:
-                                img_data["base64"] = image_to_base64(output_path, quality)
-
+                                img_data["base64"] = image_to_base64(output_path, preset)
                             images_info.append(img_data)
+                            seen[xref] = img_data
+                        else:
+                            # Decode from memory rather than a temp file
+                            source = BytesIO(image_bytes)
+                            source.name = f"img.{image_ext}"
 
-                    except Exception as e:
-                        # Skip images that can't be extracted
-                        print(f"Warning: Could not extract image {img_index} from page {page_num + 1}: {e}")
-                        continue
-
-            doc.close()
-            return images_info
-
-        finally:
-            # Clean up temporary raw images
-            import shutil
-            if temp_dir.exists():
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                            images_info.append(img_data)
+                            jobs.append((img_data, source, output_path))
+                            seen[xref] = img_data
+
+                except Exception as e:
+                    # Skip images that can't be extracted
+                    print(f"Warning: Could not extract image {img_index} from page {page_num + 1}: {e}")
+                    continue
+
+        # Compress and resize; in the shared worker pool only when there is
+        # more than one job and more than one CPU to run them on
+        job_args = [
+            (str(self.pdf_path), source, output_path, preset, image_format, return_base64)
+            for _, source, output_path in jobs
+        ]
+        if min(len(jobs), os.cpu_count() or 1) > 1:
+            results = [future.result for future in _submit_jobs(job_args)]
+        else:
+            results = [partial(_process_image, *args) for args in job_args]
+
+        failed = set()
+        for (img_data, _, _), result in zip(jobs, results):
+            try:
+                img_data.update(result())
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    _shutdown_executor()
+                print(
+                    f"Warning: Could not extract image {img_data['index']} "
+                    f"from page {img_data['page']}: {e}"
+                )
+                failed.add(id(img_data))
+
+        for img_data, original in duplicates:
+            if id(original) in failed:
+                failed.add(id(img_data))
+                continue
+            shutil.copyfile(original["path"], img_data["path"])
+            img_data.update({key: value for key, value in original.items() if key not in img_data})
+
+        return [img_data for img_data in images_info if id(img_data) not in failed]
 
     def get_metadata(self) -> dict:
         """
@@ -175,7 +405,7 @@ class PaperParser:
         Returns:
             Dictionary with metadata
         """
-        doc = pymupdf.open(str(self.pdf_path))
+        doc = self.doc
 
         metadata = {
             "filename": self.pdf_path.name,
@@ -190,7 +420,6 @@ class PaperParser:
             "modification_date": doc.metadata.get("modDate", ""),
         }
 
-        doc.close()
         return metadata
 
     def parse_full(
@@ -4,6 +4,11 @@ import json
 from pathlib import Path
 from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 import mcp.server.stdio
@@ -15,6 +20,18 @@ from .parser import PaperParser
 server = Server("parse-paper-mcp")
 
 
+def dump_json(obj: Any) -> str:
+    """Serialize obj as indented JSON, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+        except orjson.JSONEncodeError:
+            # orjson rejects strings it cannot encode as UTF-8, such as the
+            # surrogate escapes PyMuPDF returns for malformed metadata
+            pass
+    return json.dumps(obj, indent=2)
+
+
 @server.list_tools()
 async def list_tools() -> list[Tool]:
     """List available tools."""
@@ -43,8 +60,8 @@ async def list_tools() -> list[Tool]:
                     },
                     "quality": {
                         "type": "string",
-                        "enum": ["high", "medium", "low"],
-                        "description": "Image quality level (default: medium)",
+                        "enum": ["high", "medium", "low", "fast"],
+                        "description": "Image quality level (default: medium). 'fast' matches medium sizes but skips the encoder's optimize pass for lower latency.",
                         "default": "medium",
                     },
                     "image_format": {
@@ -134,8 +151,8 @@ async def list_tools() -> list[Tool]:
                     },
                     "quality": {
                         "type": "string",
-                        "enum": ["high", "medium", "low"],
-                        "description": "Image quality level (default: medium)",
+                        "enum": ["high", "medium", "low", "fast"],
+                        "description": "Image quality level (default: medium). 'fast' matches medium sizes but skips the encoder's optimize pass for lower latency.",
                         "default": "medium",
                     },
                     "image_format": {
@@ -204,55 +221,54 @@ async def handle_parse_paper(arguments: dict) -> list[TextContent]:
     max_chars = arguments.get("max_chars")
     save_text_to_file = arguments.get("save_text_to_file")
 
-    parser = PaperParser(pdf_path)
-    result = parser.parse_full(
-        output_dir=output_dir,
-        quality=quality,
-        image_format=image_format,
-        extract_images=extract_images,
-        return_base64=return_base64,
-        pages=pages,
-        max_chars=max_chars,
-        save_text_to_file=save_text_to_file,
-    )
+    with PaperParser(pdf_path) as parser:
+        result = parser.parse_full(
+            output_dir=output_dir,
+            quality=quality,
+            image_format=image_format,
+            extract_images=extract_images,
+            return_base64=return_base64,
+            pages=pages,
+            max_chars=max_chars,
+            save_text_to_file=save_text_to_file,
+        )
 
     # Format response
-    response = f"# Paper Parsing Complete\n\n"
-    response += f"## Metadata\n"
-    response += f"- **Title**: {result['metadata'].get('title', 'N/A')}\n"
-    response += f"- **Author**: {result['metadata'].get('author', 'N/A')}\n"
-    response += f"- **Pages**: {result['metadata']['page_count']}\n"
-    response += f"- **File Size**: {result['metadata']['file_size']:,} bytes\n\n"
+    parts = [f"# Paper Parsing Complete\n\n"]
+    parts.append(f"## Metadata\n")
+    parts.append(f"- **Title**: {result['metadata'].get('title', 'N/A')}\n")
+    parts.append(f"- **Author**: {result['metadata'].get('author', 'N/A')}\n")
+    parts.append(f"- **Pages**: {result['metadata']['page_count']}\n")
+    parts.append(f"- **File Size**: {result['metadata']['file_size']:,} bytes\n\n")
 
     if result['images']:
-        response += f"## Extracted Images\n"
-        response += f"Total images: {len(result['images'])}\n\n"
+        parts.append(f"## Extracted Images\n")
+        parts.append(f"Total images: {len(result['images'])}\n\n")
         for img in result['images']:
-            response += f"- **{img['filename']}** (Page {img['page']})\n"
-            response += f"  - Path: `{img['path']}`\n"
-            response += f"  - Size: {img['width']}x{img['height']} pixels\n"
-            response += f"  - File size: {img['file_size']:,} bytes\n"
+            parts.append(f"- **{img['filename']}** (Page {img['page']})\n")
+            parts.append(f"  - Path: `{img['path']}`\n")
+            parts.append(f"  - Size: {img['width']}x{img['height']} pixels\n")
+            parts.append(f"  - File size: {img['file_size']:,} bytes\n")
             if return_base64:
-                response += f"  - Base64: Available (length: {len(img['base64'])} chars)\n"
-            response += "\n"
+                parts.append(f"  - Base64: Available (length: {len(img['base64'])} chars)\n")
+            parts.append("\n")
     else:
-        response += "## Images\nNo images extracted.\n\n"
+        parts.append("## Images\nNo images extracted.\n\n")
 
-    response += f"## Text Content\n\n"
-    response += result['text']
+    parts.append(f"## Text Content\n\n")
+    parts.append(result['text'])
 
     # Also return structured data as JSON
-    json_data = json.dumps(
+    json_data = dump_json(
         {
             "metadata": result['metadata'],
             "images": result['images'],
             "text_length": len(result['text']),
-        },
-        indent=2,
+        }
     )
 
     return [
-        TextContent(type="text", text=response),
+        TextContent(type="text", text="".join(parts)),
         TextContent(type="text", text=f"\n\n---\n\n**Structured Data (JSON):**\n```json\n{json_data}\n```"),
     ]
 
@@ -264,12 +280,12 @@ async def handle_extract_text(arguments: dict) -> list[TextContent]:
     max_chars = arguments.get("max_chars")
     save_to_file = arguments.get("save_to_file")
 
-    parser = PaperParser(pdf_path)
-    text = parser.extract_text(
-        pages=pages,
-        max_chars=max_chars,
-        save_to_file=save_to_file,
-    )
+    with PaperParser(pdf_path) as parser:
+        text = parser.extract_text(
+            pages=pages,
+            max_chars=max_chars,
+            save_to_file=save_to_file,
+        )
 
     return [TextContent(type="text", text=text)]
 
@@ -282,32 +298,32 @@ async def handle_extract_images(arguments: dict) -> list[TextContent]:
     image_format = arguments.get("image_format", "jpg")
     return_base64 = arguments.get("return_base64", False)
 
-    parser = PaperParser(pdf_path)
-    images = parser.extract_images(
-        output_dir=output_dir,
-        quality=quality,
-        image_format=image_format,
-        return_base64=return_base64,
-    )
+    with PaperParser(pdf_path) as parser:
+        images = parser.extract_images(
+            output_dir=output_dir,
+            quality=quality,
+            image_format=image_format,
+            return_base64=return_base64,
+        )
 
-    response = f"# Image Extraction Complete\n\n"
-    response += f"Total images extracted: {len(images)}\n\n"
+    parts = [f"# Image Extraction Complete\n\n"]
+    parts.append(f"Total images extracted: {len(images)}\n\n")
 
     for img in images:
-        response += f"## {img['filename']}\n"
-        response += f"- **Page**: {img['page']}\n"
-        response += f"- **Path**: `{img['path']}`\n"
-        response += f"- **Dimensions**: {img['width']}x{img['height']} pixels\n"
-        response += f"- **File size**: {img['file_size']:,} bytes\n"
+        parts.append(f"## {img['filename']}\n")
+        parts.append(f"- **Page**: {img['page']}\n")
+        parts.append(f"- **Path**: `{img['path']}`\n")
+        parts.append(f"- **Dimensions**: {img['width']}x{img['height']} pixels\n")
+        parts.append(f"- **File size**: {img['file_size']:,} bytes\n")
         if return_base64:
-            response += f"- **Base64**: Available (length: {len(img['base64'])} chars)\n"
-        response += "\n"
+            parts.append(f"- **Base64**: Available (length: {len(img['base64'])} chars)\n")
+        parts.append("\n")
 
     # JSON data
-    json_data = json.dumps(images, indent=2)
+    json_data = dump_json(images)
 
     return [
-        TextContent(type="text", text=response),
+        TextContent(type="text", text="".join(parts)),
         TextContent(type="text", text=f"\n\n**JSON Data:**\n```json\n{json_data}\n```"),
     ]
 
@@ -316,25 +332,25 @@ async def handle_get_metadata(arguments: dict) -> list[TextContent]:
     """Handle get_paper_metadata tool call."""
     pdf_path = arguments["pdf_path"]
 
-    parser = PaperParser(pdf_path)
-    metadata = parser.get_metadata()
+    with PaperParser(pdf_path) as parser:
+        metadata = parser.get_metadata()
 
-    response = f"# PDF Metadata\n\n"
-    response += f"- **Filename**: {metadata['filename']}\n"
-    response += f"- **File Size**: {metadata['file_size']:,} bytes ({metadata['file_size'] / 1024 / 1024:.2f} MB)\n"
-    response += f"- **Pages**: {metadata['page_count']}\n"
-    response += f"- **Title**: {metadata.get('title', 'N/A')}\n"
-    response += f"- **Author**: {metadata.get('author', 'N/A')}\n"
-    response += f"- **Subject**: {metadata.get('subject', 'N/A')}\n"
-    response += f"- **Creator**: {metadata.get('creator', 'N/A')}\n"
-    response += f"- **Producer**: {metadata.get('producer', 'N/A')}\n"
-    response += f"- **Creation Date**: {metadata.get('creation_date', 'N/A')}\n"
-    response += f"- **Modification Date**: {metadata.get('modification_date', 'N/A')}\n"
+    parts = [f"# PDF Metadata\n\n"]
+    parts.append(f"- **Filename**: {metadata['filename']}\n")
+    parts.append(f"- **File Size**: {metadata['file_size']:,} bytes ({metadata['file_size'] / 1024 / 1024:.2f} MB)\n")
+    parts.append(f"- **Pages**: {metadata['page_count']}\n")
+    parts.append(f"- **Title**: {metadata.get('title', 'N/A')}\n")
+    parts.append(f"- **Author**: {metadata.get('author', 'N/A')}\n")
+    parts.append(f"- **Subject**: {metadata.get('subject', 'N/A')}\n")
+    parts.append(f"- **Creator**: {metadata.get('creator', 'N/A')}\n")
+    parts.append(f"- **Producer**: {metadata.get('producer', 'N/A')}\n")
+    parts.append(f"- **Creation Date**: {metadata.get('creation_date', 'N/A')}\n")
+    parts.append(f"- **Modification Date**: {metadata.get('modification_date', 'N/A')}\n")
 
-    json_data = json.dumps(metadata, indent=2)
+    json_data = dump_json(metadata)
 
     return [
-        TextContent(type="text", text=response),
+        TextContent(type="text", text="".join(parts)),
         TextContent(type="text", text=f"\n\n**JSON Data:**\n```json\n{json_data}\n```"),
     ]
 
@@ -0,0 +1,120 @@
+"""Tests for image utilities."""
+
+import base64
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from parse_paper_mcp import image_utils
+from parse_paper_mcp.image_utils import (
+    QUALITY_PRESETS,
+    compress_and_resize_image,
+    image_to_base64,
+)
+
+
+def test_compress_and_resize_image_limits_size(tmp_path):
+    """Test that large images are downscaled to the preset max size."""
+    src = tmp_path / "src.png"
+    Image.new("RGB", (3000, 1500), (200, 100, 50)).save(src)
+
+    out = tmp_path / "out.jpg"
+    metadata = compress_and_resize_image(src, out, quality="medium", image_format="jpg")
+
+    assert max(metadata["width"], metadata["height"]) == QUALITY_PRESETS["medium"].max_size
+    assert metadata["file_size"] == out.stat().st_size
+    assert metadata["format"] == "JPG"
+
+
+def test_image_to_base64_returns_jpeg(tmp_path):
+    """Test that base64 output decodes to an RGB JPEG."""
+    src = tmp_path / "src.png"
+    Image.new("RGBA", (64, 32), (0, 0, 255, 128)).save(src)
+
+    encoded = image_to_base64(src, quality="low")
+
+    with Image.open(BytesIO(base64.b64decode(encoded))) as img:
+        assert img.format == "JPEG"
+        assert img.mode == "RGB"
+        assert img.size == (64, 32)
+
+
+def test_compress_and_resize_image_downscales_large_jpeg(tmp_path):
+    """Test that large JPEG sources still land exactly on max_size."""
+    src = tmp_path / "src.jpg"
+    Image.new("RGB", (4000, 3000), (30, 60, 90)).save(src, format="JPEG")
+
+    out = tmp_path / "out.jpg"
+    metadata = compress_and_resize_image(src, out, quality="low", image_format="jpg")
+
+    assert (metadata["width"], metadata["height"]) == (768, 576)
+
+
+def test_compress_and_resize_image_accepts_pil_image(tmp_path):
+    """Test that an already-decoded image can be passed instead of a path."""
+    out = tmp_path / "out.png"
+    metadata = compress_and_resize_image(
+        Image.new("LA", (100, 50), (128, 255)), out, quality="high", image_format="png"
+    )
+
+    assert (metadata["width"], metadata["height"]) == (100, 50)
+    assert metadata["file_size"] == out.stat().st_size
+
+
+class _StubTurboJPEG:
+    """Stands in for turbojpeg.TurboJPEG and records encode arguments."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, img_array, **kwargs):
+        self.calls.append((img_array.shape, kwargs))
+        return b"turbo"
+
+
+def test_image_to_base64_uses_turbojpeg_for_fast(tmp_path, monkeypatch):
+    """Test the TurboJPEG branch of the fast preset: 4:2:0 subsampling and its quality."""
+    np = pytest.importorskip("numpy")
+    stub = _StubTurboJPEG()
+    monkeypatch.setattr(image_utils, "_get_turbojpeg", lambda: stub)
+    monkeypatch.setattr(image_utils, "np", np, raising=False)
+    monkeypatch.setattr(image_utils, "TJPF_RGB", "rgb", raising=False)
+    monkeypatch.setattr(image_utils, "TJSAMP_420", "420", raising=False)
+
+    src = tmp_path / "src.png"
+    Image.new("RGB", (64, 32), (0, 0, 255)).save(src)
+
+    encoded = image_to_base64(src, quality="fast")
+
+    assert base64.b64decode(encoded) == b"turbo"
+    assert stub.calls == [
+        (
+            (32, 64, 3),
+            {"quality": QUALITY_PRESETS["fast"].jpeg_quality, "pixel_format": "rgb", "jpeg_subsample": "420"},
+        )
+    ]
+
+
+def test_image_to_base64_keeps_pil_for_optimize(tmp_path, monkeypatch):
+    """Test that presets asking for optimized Huffman tables bypass TurboJPEG."""
+    stub = _StubTurboJPEG()
+    monkeypatch.setattr(image_utils, "_get_turbojpeg", lambda: stub)
+
+    src = tmp_path / "src.png"
+    Image.new("RGB", (64, 32), (0, 0, 255)).save(src)
+
+    encoded = image_to_base64(src, quality="low")
+
+    assert stub.calls == []
+    with Image.open(BytesIO(base64.b64decode(encoded))) as img:
+        assert img.format == "JPEG"
+
+
+def test_save_kwargs_are_read_only():
+    """Test that the cached encoder arguments cannot be mutated by a caller."""
+    kwargs = image_utils._save_kwargs("jpg", QUALITY_PRESETS["medium"])
+
+    with pytest.raises(TypeError):
+        kwargs["quality"] = 10
+    assert image_utils._save_kwargs("jpg", QUALITY_PRESETS["medium"])["quality"] == 85
@@ -1,7 +1,18 @@
 """Tests for PDF parser."""
 
+import os
+import signal
+import time
+
 import pytest
+from io import BytesIO
 from pathlib import Path
+
+import pymupdf
+import pymupdf4llm
+from PIL import Image
+
+from parse_paper_mcp import parser as parser_module
 from parse_paper_mcp.parser import PaperParser
 
 
@@ -22,5 +33,271 @@ def test_paper_parser_init_with_existing_file(tmp_path):
     assert parser.pdf_path == pdf_file
 
 
-# Note: Full integration tests would require actual PDF files
-# For now, we have basic unit tests
+@pytest.fixture
+def rag_backend():
+    """Run pymupdf4llm on its rag backend, restoring the previous backend after."""
+    if not hasattr(pymupdf4llm, "use_layout"):
+        if not hasattr(pymupdf4llm, "IdentifyHeaders"):
+            pytest.skip("pymupdf4llm cannot switch to the rag backend")
+        yield
+        return
+    # Only the rag backend exports IdentifyHeaders
+    previous_rag = hasattr(pymupdf4llm, "IdentifyHeaders")
+    pymupdf4llm.use_layout(False)
+    yield
+    pymupdf4llm.use_layout(not previous_rag)
+
+
+def _make_pdf_with_jpeg(path, size):
+    """Write a one-page PDF embedding a JPEG of the given size."""
+    buffer = BytesIO()
+    Image.new("RGB", size, (10, 200, 30)).save(buffer, format="JPEG")
+    jpeg_bytes = buffer.getvalue()
+
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_image(pymupdf.Rect(0, 0, 300, 200), stream=jpeg_bytes)
+    doc.save(str(path))
+    doc.close()
+    return jpeg_bytes
+
+
+def _make_pdf_with_pngs(path, colors):
+    """
+    Write a PDF with one 2000x1000 PNG per page, filled with each color.
+
+    Pages with the same color share a single image xref.
+    """
+    doc = pymupdf.open()
+    for color in colors:
+        buffer = BytesIO()
+        Image.new("RGB", (2000, 1000), color).save(buffer, format="PNG")
+        doc.new_page().insert_image(pymupdf.Rect(0, 0, 400, 200), stream=buffer.getvalue())
+    doc.save(str(path), garbage=3, deflate=True)
+    doc.close()
+
+
+def test_extract_images_passes_small_jpeg_through(tmp_path):
+    """Test that embedded JPEGs within max_size are copied without re-encoding."""
+    pdf_file = tmp_path / "paper.pdf"
+    jpeg_bytes = _make_pdf_with_jpeg(pdf_file, (300, 200))
+
+    images = PaperParser(pdf_file).extract_images(output_dir=tmp_path / "out")
+
+    assert len(images) == 1
+    assert Path(images[0]["path"]).read_bytes() == jpeg_bytes
+    assert images[0]["file_size"] == len(jpeg_bytes)
+    assert (images[0]["width"], images[0]["height"]) == (300, 200)
+
+
+def test_extract_images_resizes_large_jpeg(tmp_path):
+    """Test that embedded JPEGs larger than max_size are downscaled."""
+    pdf_file = tmp_path / "paper.pdf"
+    _make_pdf_with_jpeg(pdf_file, (3000, 2000))
+
+    images = PaperParser(pdf_file).extract_images(output_dir=tmp_path / "out", quality="low")
+
+    assert len(images) == 1
+    assert (images[0]["width"], images[0]["height"]) == (768, 512)
+
+
+@pytest.fixture
+def worker_pool(monkeypatch):
+    """Force the process-pool path even on single-CPU machines."""
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    yield
+    parser_module._shutdown_executor()
+
+
+def test_extract_images_keeps_page_order(tmp_path, worker_pool):
+    """Test that images compressed in parallel come back in page order."""
+    pdf_file = tmp_path / "paper.pdf"
+    _make_pdf_with_pngs(pdf_file, [(255, 0, 0), (0, 255, 0), (0, 0, 255)])
+
+    images = PaperParser(pdf_file).extract_images(
+        output_dir=tmp_path / "out", quality="low", return_base64=True
+    )
+
+    assert [img["page"] for img in images] == [1, 2, 3]
+    assert all((img["width"], img["height"]) == (768, 384) for img in images)
+    assert all(img["base64"] for img in images)
+
+
+def test_extract_images_replaces_broken_pool(tmp_path, worker_pool):
+    """Test that a worker killed while the pool is idle does not break later calls."""
+    pdf_file = tmp_path / "paper.pdf"
+    _make_pdf_with_pngs(pdf_file, [(255, 0, 0), (0, 0, 255)])
+    parser = PaperParser(pdf_file)
+    assert len(parser.extract_images(output_dir=tmp_path / "first")) == 2
+
+    executor = parser_module._executor
+    os.kill(next(iter(executor._processes)), signal.SIGKILL)
+    deadline = time.monotonic() + 10
+    while not executor._broken and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert executor._broken
+
+    images = parser.extract_images(output_dir=tmp_path / "second")
+
+    assert [img["page"] for img in images] == [1, 2]
+    assert parser_module._executor is not executor
+
+
+def test_paper_parser_reuses_document(tmp_path):
+    """Test that text, image and metadata extraction share one open document."""
+    pdf_file = tmp_path / "paper.pdf"
+    _make_pdf_with_jpeg(pdf_file, (300, 200))
+
+    parser = PaperParser(pdf_file)
+    doc = parser.doc
+    result = parser.parse_full(output_dir=tmp_path / "out")
+
+    assert parser.doc is doc
+    assert result["metadata"]["page_count"] == 1
+    assert len(result["images"]) == 1
+
+
+def test_extract_text_stops_at_max_chars(tmp_path, rag_backend):
+    """Test that max_chars truncation only converts the pages it needs."""
+    pdf_file = tmp_path / "paper.pdf"
+    doc = pymupdf.open()
+    for page_num in range(5):
+        doc.new_page().insert_text((72, 72), f"Page {page_num} " + "body text " * 20)
+    doc.save(str(pdf_file))
+    doc.close()
+
+    text = PaperParser(pdf_file).extract_text(max_chars=100)
+
+    assert text.startswith("Page 0")
+    assert "TEXT TRUNCATED" in text
+    assert "from the first 1 of 5 pages" in text
+
+
+def test_extract_text_max_chars_not_reached(tmp_path, rag_backend):
+    """Test that short documents are returned whole under max_chars."""
+    pdf_file = tmp_path / "paper.pdf"
+    doc = pymupdf.open()
+    for page_num in range(2):
+        doc.new_page().insert_text((72, 72), f"Page {page_num}")
+    doc.save(str(pdf_file))
+    doc.close()
+
+    parser = PaperParser(pdf_file)
+    assert parser.extract_text(max_chars=10_000) == parser.extract_text()
+
+
+def test_extract_images_reuses_repeated_xref(tmp_path):
+    """Test that an image drawn on several pages is only processed once."""
+    pdf_file = tmp_path / "paper.pdf"
+    _make_pdf_with_pngs(pdf_file, [(255, 0, 0)] * 3)
+
+    images = PaperParser(pdf_file).extract_images(output_dir=tmp_path / "out", return_base64=True)
+
+    assert [img["filename"] for img in images] == ["page1_img1.jpg", "page2_img1.jpg", "page3_img1.jpg"]
+    first = Path(images[0]["path"]).read_bytes()
+    for img in images[1:]:
+        assert Path(img["path"]).read_bytes() == first
+        assert img["base64"] == images[0]["base64"]
+        assert (img["width"], img["height"]) == (images[0]["width"], images[0]["height"])
+
+
+def test_paper_parser_close(tmp_path):
+    """Test that the context manager closes the shared document."""
+    pdf_file = tmp_path / "paper.pdf"
+    _make_pdf_with_jpeg(pdf_file, (300, 200))
+
+    with PaperParser(pdf_file) as parser:
+        doc = parser.doc
+        parser.get_metadata()
+
+    assert doc.is_closed
+    assert parser._doc is None
+
+
+def test_extract_text_leaves_shared_document_untouched(tmp_path, rag_backend):
+    """Test that text conversion does not bake annotations in the shared document."""
+    pdf_file = tmp_path / "paper.pdf"
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Body text")
+    page.add_text_annot((100, 100), "Note")
+    doc.save(str(pdf_file))
+    doc.close()
+
+    parser = PaperParser(pdf_file)
+    shared = parser.doc
+    parser.extract_text()
+
+    assert parser.doc is shared
+    assert shared[0].first_annot is not None
+
+
+def _make_pdf_with_headings(path):
+    """Write a six-page PDF with a title and a section heading on every page."""
+    doc = pymupdf.open()
+    for page_num in range(6):
+        page = doc.new_page()
+        y = 72
+        if page_num == 0:
+            page.insert_text((72, y), "Paper Title", fontsize=26)
+            y += 50
+        page.insert_text((72, y), f"{page_num + 1} Section Heading", fontsize=16)
+        for line in range(8):
+            page.insert_text((72, y + 30 + line * 14), "Body text sentence goes on. " * 3, fontsize=10)
+    doc.save(str(path))
+    doc.close()
+
+
+@pytest.mark.parametrize("use_rag", [False, True])
+def test_extract_text_max_chars_keeps_heading_levels(tmp_path, request, use_rag):
+    """Test that a max_chars limit that is never reached does not change the Markdown."""
+    if use_rag:
+        request.getfixturevalue("rag_backend")
+    pdf_file = tmp_path / "paper.pdf"
+    _make_pdf_with_headings(pdf_file)
+
+    parser = PaperParser(pdf_file)
+    text = parser.extract_text(max_chars=1_000_000)
+
+    assert text == parser.extract_text()
+    assert [line.strip() for line in text.splitlines() if line.startswith("#")] == [
+        "# Paper Title",
+        *(f"## {n} Section Heading" for n in range(1, 7)),
+    ]
+
+
+def test_extract_images_keeps_stencil_masks(tmp_path):
+    """Test that /ImageMask stencils, which have no colorspace, are still extracted."""
+    pdf_file = tmp_path / "paper.pdf"
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Figure")
+    xref = doc.get_new_xref()
+    doc.update_object(
+        xref, "<< /Type /XObject /Subtype /Image /Width 64 /Height 64 /ImageMask true /BitsPerComponent 1 >>"
+    )
+    doc.update_stream(xref, bytes([0xF0, 0x0F]) * 256)
+    resources = int(doc.xref_get_key(page.xref, "Resources")[1].split()[0])
+    doc.xref_set_key(resources, "XObject", f"<< /Im0 {xref} 0 R >>")
+    contents = page.get_contents()[0]
+    doc.update_stream(contents, doc.xref_stream(contents) + b"\nq 64 0 0 64 100 100 cm /Im0 Do Q\n")
+    doc.save(str(pdf_file))
+    doc.close()
+
+    images = PaperParser(pdf_file).extract_images(output_dir=tmp_path / "out")
+
+    assert len(images) == 1
+    assert (images[0]["width"], images[0]["height"]) == (64, 64)
+    assert Path(images[0]["path"]).exists()
+
+
+def test_extract_images_runs_inline_on_one_cpu(tmp_path, monkeypatch):
+    """Test that no worker pool is created when only one CPU is available."""
+    monkeypatch.setattr(os, "cpu_count", lambda: 1)
+    pdf_file = tmp_path / "paper.pdf"
+    _make_pdf_with_pngs(pdf_file, [(255, 0, 0), (0, 0, 255)])
+
+    images = PaperParser(pdf_file).extract_images(output_dir=tmp_path / "out")
+
+    assert len(images) == 2
+    assert parser_module._executor is None
@@ -0,0 +1,33 @@
+"""Tests for MCP server helpers."""
+
+import json
+
+import pymupdf
+
+from parse_paper_mcp.parser import PaperParser
+from parse_paper_mcp.server import dump_json
+
+
+def test_dump_json_matches_stdlib_layout():
+    """Test that dump_json produces the same indented JSON as json.dumps."""
+    data = {"images": [{"page": 1, "width": 10}], "title": "Paper"}
+
+    assert json.loads(dump_json(data)) == data
+    assert dump_json(data) == json.dumps(data, indent=2)
+
+
+def test_dump_json_handles_malformed_metadata(tmp_path):
+    """Test that surrogate-escaped metadata strings still serialize."""
+    pdf_file = tmp_path / "paper.pdf"
+    doc = pymupdf.open()
+    doc.new_page()
+    doc.set_metadata({"title": "placeholder"})
+    info_xref = int(doc.xref_get_key(-1, "Info")[1].split()[0])
+    doc.xref_set_key(info_xref, "Title", "<FEFFD800>")
+    doc.save(str(pdf_file))
+    doc.close()
+
+    with PaperParser(pdf_file) as parser:
+        metadata = parser.get_metadata()
+
+    assert json.loads(dump_json(metadata))["title"] == metadata["title"]